@@ -0,0 +1,207 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+import wav_reader
+
+# Number of samples per block. Every frame feature is assembled from per-block sums of squares
+BLOCK = 512
+
+# Directory holding the feature sidecars, shared by all audio directories since sidecars are keyed by content
+CACHE_DIR = os.environ.get("FEATURE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nptel_features"))
+
+
+# Function for hashing the content of an audio file
+
+def file_key(file_path, chunk_size=1 << 20):
+    """
+    Return a hash of the file content, so renamed or copied files share their features.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sidecar_path(key, name, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{key}_{name}")
+
+
+# Function for replacing a cache file in one step, so that processes sharing the cache never read a partial file
+
+def write_atomic(path, write):
+    """
+    Call `write` with a binary file opened next to `path`, then move that file into place.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+# Function for getting the content hash of a file without reading it again while it is unchanged
+
+def cached_file_key(file_path, cache_dir=None):
+    """
+    Return file_key(file_path), remembered in `cache_dir` under the path, size and
+    modification time of the file so that unchanged files are only hashed once.
+    """
+    stat = os.stat(file_path)
+    signature = f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    lookup = sidecar_path(hashlib.blake2b(signature.encode("utf-8"), digest_size=16).hexdigest(), "key.txt", cache_dir)
+    try:
+        with open(lookup, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        pass
+
+    key = file_key(file_path)
+    write_atomic(lookup, lambda f: f.write(key.encode("utf-8")))
+    return key
+
+
+# Function for computing the sum of squares of every block of samples
+
+def compute_block_power(file_path, block=BLOCK, start=0, stop=None):
+    """
+    Stream an audio file and return the sum of squared samples of each block.
+    16-bit PCM .wav files are read through a memory map one window at a time.
+
+    Returns:
+    - numpy float64 array with one value per block (the last block may be partial).
+    """
+    power = []
+    for y in wav_reader.open_audio(file_path).blocks(block * 1024, start, stop):
+        y = y.astype(np.float64)
+        n_blocks = int(np.ceil(len(y) / block))
+        y = np.pad(y, (0, n_blocks * block - len(y)))
+        power.append(np.sum(y.reshape(n_blocks, block) ** 2, axis=1))
+
+    if not power:
+        return np.zeros(0)
+    return np.concatenate(power)
+
+
+# Functions for recording and looking up where a clipped file was cut from
+
+def record_clip(file_path, source_path, offset, num_samples, cache_dir=None):
+    """
+    Record that `file_path` holds `num_samples` samples of `source_path` starting at `offset`.
+    The hash of the source is recorded too, so a source that changes later is not used.
+    """
+    path = sidecar_path(cached_file_key(file_path, cache_dir), "clip.json", cache_dir)
+    clip = {"source": os.path.abspath(source_path), "source_key": cached_file_key(source_path, cache_dir),
+            "offset": offset, "num_samples": num_samples}
+    write_atomic(path, lambda f: f.write(json.dumps(clip).encode("utf-8")))
+
+
+def clip_source(key, cache_dir=None):
+    """
+    Return (source path, offset in samples, number of samples) for the file with
+    hash `key` if it was recorded as a clip and its source is unchanged, or None.
+    """
+    try:
+        with open(sidecar_path(key, "clip.json", cache_dir), 'r') as f:
+            clip = json.load(f)
+        if cached_file_key(clip["source"], cache_dir) != clip["source_key"]:
+            return None
+    except (OSError, KeyError, json.JSONDecodeError):
+        return None
+    return clip["source"], clip["offset"], clip["num_samples"]
+
+
+# Function for getting the block features of a file, computing them only once
+
+def block_power(file_path, block=BLOCK, cache_dir=None):
+    """
+    Return the per-block sums of squares of an audio file.
+
+    The features are read from a .npy sidecar in `cache_dir` keyed by the file
+    hash and block size. When missing, a file clipped by t2_process.py reuses the
+    features of its source, otherwise the audio is decoded once and the sidecar
+    is written.
+    """
+    key = cached_file_key(file_path, cache_dir)
+    path = sidecar_path(key, f"power{block}.npy", cache_dir)
+    if os.path.exists(path):
+        return np.load(path).astype(np.float64)
+
+    clip = clip_source(key, cache_dir)
+    if clip is not None and clip[1] % block == 0:
+        source, offset, num_samples = clip
+        first = offset // block
+        n_full = num_samples // block
+        power = block_power(source, block, cache_dir)[first:first + n_full]
+        if len(power) != n_full:
+            power = compute_block_power(file_path, block)
+        # A partial last block of the clip differs from the source block, so only that block is read
+        elif num_samples % block:
+            power = np.append(power, compute_block_power(file_path, block, start=n_full * block))
+    else:
+        power = compute_block_power(file_path, block)
+
+    # The features are returned as saved, so the first run sees the same values as later runs
+    power = power.astype(np.float32)
+    write_atomic(path, lambda f: np.save(f, power))
+    return power.astype(np.float64)
+
+
+# Function for the energy of non-overlapping frames, as used by t2_process.py
+
+def frame_energy(file_path, frame_length=2048, block=BLOCK, cache_dir=None):
+    """
+    Return the sum of squares of consecutive frames of `frame_length` samples.
+    `frame_length` must be a multiple of `block`.
+    """
+    power = block_power(file_path, block, cache_dir)
+    ratio = frame_length // block
+    power = np.pad(power, (0, -len(power) % ratio))
+    return power.reshape(-1, ratio).sum(axis=1)
+
+
+# Function for the centered RMS of overlapping frames, matching librosa.feature.rms
+
+def frame_rms(file_path, frame_length=2048, hop_length=BLOCK, cache_dir=None):
+    """
+    Return the RMS of frames centered every `hop_length` samples with zero padding,
+    as computed by librosa.feature.rms. `frame_length` must be an even multiple of `hop_length`.
+    """
+    power = block_power(file_path, hop_length, cache_dir)
+    num_samples = wav_reader.info(file_path)[1]
+    half = frame_length // hop_length // 2
+    # Frame t covers the blocks t - half to t + half - 1
+    padded = np.concatenate((np.zeros(half), power, np.zeros(half + 1)))
+    cumulative = np.concatenate(([0], np.cumsum(padded)))
+    n_frames = 1 + num_samples // hop_length
+    t = np.arange(n_frames)
+    sums = cumulative[t + 2 * half] - cumulative[t]
+    return np.sqrt(np.maximum(sums, 0) / frame_length)
+
+
+# Function for the non-silent intervals of a file, matching librosa.effects.split
+
+def split(file_path, top_db=20, frame_length=2048, hop_length=BLOCK, cache_dir=None):
+    """
+    Return the non-silent intervals as an array of [start, end) sample indices.
+    """
+    mse = frame_rms(file_path, frame_length, hop_length, cache_dir) ** 2
+    if len(mse) == 0:
+        return np.zeros((0, 2), dtype=int)
+    db = 10 * np.log10(np.maximum(mse, 1e-10)) - 10 * np.log10(max(mse.max(), 1e-10))
+    non_silent = db > -top_db
+
+    edges = [np.flatnonzero(np.diff(non_silent.astype(int))) + 1]
+    if non_silent[0]:
+        edges.insert(0, np.array([0]))
+    if non_silent[-1]:
+        edges.append(np.array([len(non_silent)]))
+    edges = np.minimum(np.concatenate(edges) * hop_length, wav_reader.info(file_path)[1])
+    return edges.reshape((-1, 2))
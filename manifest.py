@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import numpy as np
+
+# Lines starting with this prefix hold the aggregates written by t5_json.py and are not entries
+HEADER_PREFIX = b'{"aggregates"'
+
+# Matches a JSON string value of the "text" field, including escaped characters
+TEXT_FIELD = re.compile(rb'"text":\s*"(?:[^"\\]|\\.)*"\s*,?\s*')
+
+
+# Function for finding the byte offset at which every line of a file starts
+
+def build_index(json_path, chunk_size=1 << 24):
+    """
+    Scan a JSONL file once and return the byte offsets of its lines.
+
+    Returns:
+    - numpy int64 array with the start offset of every non-blank line followed by the file size.
+    """
+    starts = []
+    first_bytes = []
+    position = 0
+    line_starts_chunk = True
+    with open(json_path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            chunk_starts = np.flatnonzero(data == ord("\n")) + 1
+            chunk_starts = chunk_starts[chunk_starts < len(chunk)]
+            if line_starts_chunk:
+                chunk_starts = np.concatenate(([0], chunk_starts))
+            starts.append(chunk_starts.astype(np.int64) + position)
+            first_bytes.append(data[chunk_starts])
+            line_starts_chunk = chunk[-1:] == b"\n"
+            position += len(chunk)
+
+    if not starts:
+        return np.array([position], dtype=np.int64)
+    offsets = np.concatenate(starts)
+    ends = np.append(offsets[1:], position)
+
+    # Entries start with "{", so only lines starting with whitespace can be blank; those few are read back
+    blank = np.zeros(len(offsets), dtype=bool)
+    candidates = np.flatnonzero(np.isin(np.concatenate(first_bytes), np.frombuffer(b" \t\r\n", dtype=np.uint8)))
+    if len(candidates) > 0:
+        with open(json_path, 'rb') as file:
+            for i in candidates:
+                file.seek(int(offsets[i]))
+                blank[i] = not file.read(int(ends[i] - offsets[i])).strip()
+    return np.append(offsets[~blank], position)
+
+
+# Function for loading a persisted index, rebuilding it when the manifest has changed
+
+def load_index(json_path, index_path=None):
+    index_path = index_path or json_path + ".idx.npy"
+    size = os.path.getsize(json_path)
+    try:
+        if os.path.getmtime(index_path) >= os.path.getmtime(json_path):
+            offsets = np.load(index_path)
+            if len(offsets) > 0 and offsets[-1] == size:
+                return offsets
+    except (OSError, ValueError):
+        pass
+
+    offsets = build_index(json_path)
+    try:
+        np.save(index_path, offsets)
+    except OSError as e:
+        print(f"Warning: Could not save the manifest index to {index_path} - {e}")
+    return offsets
+
+
+# Class for an entry whose "text" field is decoded only when it is accessed
+
+class LazyEntry(dict):
+    """
+    Manifest entry that defers decoding of its "text" field.
+
+    Until "text" is accessed it is left out of keys(), items(), iteration and
+    json.dumps(entry), so call materialize() before serializing an entry.
+    """
+
+    def __init__(self, fields: dict, text_span: bytes):
+        super().__init__(fields)
+        self._text_span = text_span
+
+    def _load_text(self) -> None:
+        span = self._text_span.rstrip().rstrip(b",")
+        self["text"] = json.loads(b"{" + span + b"}")["text"]
+        self._text_span = None
+
+    def __missing__(self, key):
+        if key == "text" and self._text_span is not None:
+            self._load_text()
+            return self["text"]
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return super().__contains__(key) or (key == "text" and self._text_span is not None)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def materialize(self) -> dict:
+        """Return a plain dict with every field decoded"""
+        if self._text_span is not None:
+            self._load_text()
+        return dict(self)
+
+
+# Class for random and streaming access to a JSONL manifest through a byte-offset index
+
+class Manifest:
+    """Indexed read access to a JSONL manifest"""
+
+    def __init__(self, json_path: str, index_path: str = None):
+        """
+        Args:
+            json_path: Path to the JSONL manifest
+            index_path: Where to persist the index (defaults to <json_path>.idx.npy)
+        """
+        self.json_path = json_path
+        self.offsets = load_index(json_path, index_path)
+        self.file = open(json_path, 'rb')
+
+        # The aggregates line of t5_json.py output is kept apart from the entries
+        self.has_header = len(self.offsets) > 1 and self._read_line(0, len(HEADER_PREFIX)) == HEADER_PREFIX
+        self.first = 1 if self.has_header else 0
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1 - self.first
+
+    def _read_line(self, line_number: int, length: int = None) -> bytes:
+        start = int(self.offsets[line_number])
+        end = int(self.offsets[line_number + 1])
+        self.file.seek(start)
+        return self.file.read(end - start if length is None else min(length, end - start))
+
+    @property
+    def header(self):
+        """The aggregates of a t5_json.py output file, or None"""
+        if not self.has_header:
+            return None
+        return json.loads(self._read_line(0))["aggregates"]
+
+    def raw(self, i: int) -> bytes:
+        """Return the bytes of entry i, including the trailing newline"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Entry {i} out of range for {len(self)} entries")
+        return self._read_line(i + self.first)
+
+    def __getitem__(self, i: int) -> dict:
+        return json.loads(self.raw(i))
+
+    def lazy(self, i: int) -> LazyEntry:
+        """Return entry i with its "text" field decoded only on access"""
+        return parse_lazy(self.raw(i))
+
+    def byte_range(self, i: int) -> tuple:
+        """Return the (start, end) byte offsets of entry i"""
+        return int(self.offsets[i + self.first]), int(self.offsets[i + self.first + 1])
+
+    def __iter__(self):
+        return self.iter_entries()
+
+    def iter_entries(self, text: str = "eager"):
+        """
+        Yield the entries in order, reading the file sequentially.
+
+        Args:
+            text: "eager" decodes every field, "lazy" defers decoding of "text"
+                  and "skip" leaves "text" out of the entries
+        """
+        self.file.seek(int(self.offsets[self.first]))
+        for line_number in range(self.first, len(self.offsets) - 1):
+            line = self.file.read(int(self.offsets[line_number + 1] - self.offsets[line_number]))
+            try:
+                if text == "eager":
+                    yield json.loads(line)
+                else:
+                    entry = parse_lazy(line)
+                    yield entry if text == "lazy" else dict(entry)
+            except json.JSONDecodeError as e:
+                print(f"Error decoding JSON on line {line_number + 1} of {self.json_path}: {e}")
+
+
+# Function for decoding every field of a line except "text"
+
+def parse_lazy(line: bytes) -> LazyEntry:
+    match = TEXT_FIELD.search(line)
+    # The match must be a top-level field: anything opening an object or array
+    # before it (besides the entry itself) could nest it, so such lines are decoded fully
+    prefix = line[:match.start()] if match is not None else b""
+    if match is None or prefix.count(b"{") + prefix.count(b"[") > 1:
+        return LazyEntry(json.loads(line), None)
+    rest = (line[:match.start()] + line[match.end():]).rstrip()
+    # Removing the last field leaves a dangling comma before the closing brace
+    rest = re.sub(rb",\s*}$", b"}", rest)
+    return LazyEntry(json.loads(rest), match.group())
+
+
+# Function for counting the entries of a manifest without decoding them
+
+def count_entries(json_path) -> int:
+    with Manifest(json_path) as manifest:
+        return len(manifest)
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import time
+import runpy
+import argparse
+import subprocess
+
+# Subcommands and the script implementing each of them. A script, and so its
+# dependencies, is only imported when its subcommand runs.
+COMMANDS = {
+    "download": ("t1_downloader.py", "Download course transcripts and lecture audios from NPTEL."),
+    "wav": ("t2_wav.sh", "Convert lecture audios to 16 kHz mono .wav files."),
+    "process": ("t2_process.py", "Clip the music at the start and end of .wav files."),
+    "txt": ("t3_txt.py", "Extract and clean the text of transcript PDFs."),
+    "dedup": ("t3_dedup.py", "Find lectures duplicating already indexed lectures."),
+    "manifest": ("t4_manifest.py", "Generate a training manifest."),
+    "segment": ("t4_segment.py", "Split a training manifest into utterance-sized segments."),
+    "metrics": ("t5_json.py", "Add audio and text metrics to a manifest."),
+    "tokens": ("token_stats.py", "Build, merge and query token frequency indexes."),
+    "query": ("t5_query.py", "Select a subset of a manifest with a filter on its metrics."),
+    "dashboard": ("t5_dashboard.py", "Visualize the metrics of a manifest."),
+    "shards": ("t6_shards.py", "Pack a manifest into sequential shards for training."),
+}
+
+# Modules that take long to import and must not be imported by the CLI itself
+HEAVY_MODULES = ["numpy", "soundfile", "librosa", "selenium", "yt_dlp", "bs4", "requests",
+                 "fitz", "num2words", "dash", "plotly", "pandas"]
+
+# Commands whose --help is timed by default: the stages with the heaviest dependencies and two cheap ones
+BENCH_COMMANDS = ["download", "process", "txt", "metrics", "dashboard", "manifest", "query"]
+
+# Maximum start-up time (in seconds, on top of the bare interpreter) allowed by bench-imports
+IMPORT_BUDGET = 0.25
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Function for running the script of a subcommand with the remaining arguments
+
+def run_command(command, args):
+    script = os.path.join(REPO_DIR, COMMANDS[command][0])
+    if script.endswith(".sh"):
+        # Shell scripts have no --help of their own, so their arguments are taken from the usage comment
+        if "-h" in args or "--help" in args:
+            with open(script, 'r') as f:
+                usage = re.search(r"^# Usage: \S+ (.*)$", f.read(), re.MULTILINE)
+            print(f"usage: pipeline.py {command} {usage.group(1) if usage else '...'}\n\n{COMMANDS[command][1]}")
+            return 0
+        return subprocess.run(["bash", script] + args).returncode
+
+    sys.argv = [script] + args
+    runpy.run_path(script, run_name="__main__")
+    return 0
+
+
+# Function for timing a command in fresh interpreters
+
+def time_command(command, repeats):
+    """
+    Returns:
+    - Tuple of (fastest run in seconds, completed process of the last run). Stops at the first failing run.
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, cwd=REPO_DIR)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return elapsed, result
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+# Function for checking the start-up time of the CLI against the budget
+
+def bench_imports(commands, budget=IMPORT_BUDGET, repeats=5):
+    """
+    Time `pipeline.py --help` and `pipeline.py <command> --help` for each of
+    `commands` against the bare interpreter, and check that the CLI itself does
+    not import any of HEAVY_MODULES.
+
+    Returns:
+    - True if every command exits successfully within `budget` seconds of the bare interpreter.
+    """
+    python = sys.executable
+    pipeline = os.path.join(REPO_DIR, "pipeline.py")
+    baseline, _ = time_command([python, "-c", "pass"], repeats)
+    print(f"{'python -c pass':<32}{baseline:8.3f} s")
+
+    passed = True
+    for command in [[]] + [[c] for c in commands]:
+        name = " ".join(["pipeline.py"] + command + ["--help"])
+        elapsed, result = time_command([python, pipeline] + command + ["--help"], repeats)
+        overhead = elapsed - baseline
+        if result.returncode != 0:
+            # A command that crashes is not a fast start
+            passed = False
+            error = result.stderr.strip().splitlines()
+            print(f"{name:<32}{overhead:+8.3f} s  failed with exit status {result.returncode}"
+                  + (f": {error[-1]}" if error else ""))
+            continue
+        within = overhead <= budget
+        passed = passed and within
+        print(f"{name:<32}{overhead:+8.3f} s  {'ok' if within else 'over budget'}")
+
+    check = "import sys, pipeline; print(' '.join(m for m in pipeline.HEAVY_MODULES if m in sys.modules))"
+    imported = subprocess.run([python, "-c", check], capture_output=True, text=True, cwd=REPO_DIR).stdout.split()
+    if imported:
+        print(f"Error: The CLI imports {', '.join(imported)} at start-up")
+        passed = False
+
+    print(f"Budget: {budget:.3f} s - {'passed' if passed else 'failed'}")
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="NPTEL speech-to-text pipeline. Run 'python pipeline.py <command> --help' for the options of a command.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<14}{help_text}" for name, (_, help_text) in COMMANDS.items())
+               + f"\n  {'bench-imports':<14}Check the start-up time of the commands against a budget.")
+    parser.add_argument("command", choices=list(COMMANDS) + ["bench-imports"], metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench-imports":
+        bench_parser = argparse.ArgumentParser(prog="pipeline.py bench-imports",
+                                               description="Check the start-up time of the commands against a budget.")
+        bench_parser.add_argument("--budget", type=float, default=IMPORT_BUDGET,
+                                  help=f"Maximum start-up time in seconds on top of the bare interpreter (default {IMPORT_BUDGET}).")
+        bench_parser.add_argument("--repeats", type=int, default=5, help="Number of runs per command; the fastest counts (default 5).")
+        bench_parser.add_argument("--commands", nargs="*", default=BENCH_COMMANDS, choices=list(COMMANDS),
+                                  help=f"Commands whose --help is timed as well (default: {' '.join(BENCH_COMMANDS)}).")
+        bench_args = bench_parser.parse_args(args.args)
+        return 0 if bench_imports(bench_args.commands, bench_args.budget, bench_args.repeats) else 1
+
+    return run_command(args.command, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,9 @@
 import os
 import time
-import requests
 from typing import Dict, Optional
 import argparse
 
-# importing basic web selection tools
-import yt_dlp
-from bs4 import BeautifulSoup as bs
-
-# Importing Selenium tools
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+# Selenium, requests and yt_dlp are imported in the methods that use them, so the script starts without loading them
 
 class NPTELDownloader:
     """Class to handle downloading of NPTEL course transcripts"""
@@ -29,12 +20,22 @@ class NPTELDownloader:
         self.download_folder = download_folder
         self.driver = None
         self.wait = None
+        self.By = None
+        self.EC = None
         self.transcript_download_links = {}
         self.lecture_download_links = {}
         self.tab_number = 1
 
     def setup_driver(self) -> None:
         """Initialize and setup the Chrome WebDriver"""
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # Kept for the other methods, which all run after the driver is set up
+        self.By = By
+        self.EC = EC
         self.driver = webdriver.Chrome()
         self.driver.get(self.course_url)
         self.driver.maximize_window()
@@ -43,15 +44,15 @@ class NPTELDownloader:
 
     def click_initial_buttons(self, tab_name: str) -> None:
         """Click the course details and transcript buttons"""
-        course_details_button = self.wait.until(EC.presence_of_element_located(
-            (By.XPATH, "/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[2]/span[2]")))
+        course_details_button = self.wait.until(self.EC.presence_of_element_located(
+            (self.By.XPATH, "/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[2]/span[2]")))
         course_details_button.click()
 
         # Wait for the button element to be present and find the correct tab
         while True:
             try:
-                section_button = self.wait.until(EC.presence_of_element_located(
-                            (By.XPATH, f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[1]")))
+                section_button = self.wait.until(self.EC.presence_of_element_located(
+                            (self.By.XPATH, f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[1]")))
                 # Only click if it contains tab_name text
                 if tab_name in section_button.text:
                     section_button.click()
@@ -73,7 +74,7 @@ class NPTELDownloader:
         """
         try:
             dropdown_xpath = f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[2]/div[{lec_index}]/div[1]/app-nptel-dropdown/div"
-            language_dropdown_button = self.wait.until(EC.presence_of_element_located((By.XPATH, dropdown_xpath)))
+            language_dropdown_button = self.wait.until(self.EC.presence_of_element_located((self.By.XPATH, dropdown_xpath)))
             language_dropdown_button.click()
 
             self._retry_click_language_option(lec_index)
@@ -116,7 +117,7 @@ class NPTELDownloader:
                 print(f"Attempt {attempt + 1} to click language option for dropdown {lec_index}")
                 option_xpath = f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[2]/div[{lec_index}]/div[1]/app-nptel-dropdown/ul/li"
                 
-                option_element = self.wait.until(EC.element_to_be_clickable((By.XPATH, option_xpath)))
+                option_element = self.wait.until(self.EC.element_to_be_clickable((self.By.XPATH, option_xpath)))
                 option_element.click()
                 print(f"Successfully clicked language option for dropdown {lec_index}")
                 break
@@ -139,7 +140,7 @@ class NPTELDownloader:
         while attempt < max_attempts:
             try:
                 download_xpath = f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[2]/div[{lec_index}]/div[2]/a"
-                download_link = self.wait.until(EC.element_to_be_clickable((By.XPATH, download_xpath)))
+                download_link = self.wait.until(self.EC.element_to_be_clickable((self.By.XPATH, download_xpath)))
                 
                 download_url = download_link.get_attribute('href')
                 file_id = download_url.split('/')[5]
@@ -168,7 +169,7 @@ class NPTELDownloader:
         while attempt < max_attempts:
             try:
                 download_xpath = f"/html/body/app-root/app-course-details/main/section/app-course-detail-ui/div/div[3]/app-course-downloads/div/div[{self.tab_number}]/div[2]/div[{lec_index}]/div/a"
-                download_link = self.wait.until(EC.element_to_be_clickable((By.XPATH, download_xpath)))
+                download_link = self.wait.until(self.EC.element_to_be_clickable((self.By.XPATH, download_xpath)))
                 
                 download_url = download_link.get_attribute('href')
                 filename = download_url.split('/')[-1]  # Get the mp4 filename
@@ -186,6 +187,8 @@ class NPTELDownloader:
 
     def download_transcript_files(self) -> None:
         """Download all files from collected download links"""
+        import requests
+
         if not os.path.exists(os.path.join(self.download_folder, 'transcripts')):
             os.makedirs(os.path.join(self.download_folder, 'transcripts'))
             
@@ -209,6 +212,8 @@ class NPTELDownloader:
     
     def download_lecture_files(self) -> None:
         """Download all files from collected download links"""
+        import yt_dlp
+
         if not os.path.exists(os.path.join(self.download_folder, 'lectures')):
             os.makedirs(os.path.join(self.download_folder, 'lectures'))
             
@@ -240,13 +245,13 @@ class NPTELDownloader:
                 
             time.sleep(1)
 
-    def _get_filename(self, response: requests.Response, file_id: str) -> str:
+    def _get_filename(self, response: "requests.Response", file_id: str) -> str:
         """Extract filename from response headers or generate default name"""
         if 'content-disposition' in response.headers:
             return response.headers['content-disposition'].split('filename=')[1].strip('"')
         return f'{file_id}.txt'
 
-    def _save_file(self, response: requests.Response, filepath: str) -> None:
+    def _save_file(self, response: "requests.Response", filepath: str) -> None:
         """Save downloaded file to disk"""
         with open(filepath, 'wb') as f:
             for chunk in response.iter_content(chunk_size=1024):
@@ -1,15 +1,16 @@
 import os
-import sys
+import argparse
 import numpy as np
-import librosa
-import soundfile as sf
+
+import feature_store
+import wav_reader
 
 def segment_audio(file_path):
-    # Load audio file
-    y, sr = librosa.load(file_path, sr=None)
+    # Read the audio file information
+    sr, num_samples = wav_reader.info(file_path)
     
-    # Compute energy of the audio signal
-    energy = np.array([np.sum(np.abs(y[i:i + 2048] ** 2)) for i in range(0, len(y), 2048)])
+    # Compute energy of the audio signal (cached by the feature store)
+    energy = feature_store.frame_energy(file_path, 2048)
     
     # Define a threshold for energy to identify segments (this can be adjusted)
     threshold = np.mean(energy) * 0.25
@@ -30,15 +31,20 @@ def segment_audio(file_path):
     
     # Check if there's an ongoing segment at the end of the file
     if start is not None:
-        end = len(y) / sr  # End at the last sample
+        end = num_samples / sr  # End at the last sample
         segments.append((start, end))
     
     return segments
 
-def clip_audio(y, sr, start_time, duration_to_remove):
-    start_sample = int(start_time * sr)
-    end_sample = len(y)  # Clip until the end of the audio
+def clip_bounds(num_samples, sr, start_time, duration_to_remove, align=1):
+    # The start is rounded to a multiple of `align` samples so that cached features of the source line up
+    start_sample = int(round(start_time * sr / align)) * align
+    end_sample = num_samples  # Clip until the end of the audio
     new_end_sample = max(start_sample, end_sample - int(duration_to_remove * sr))
+    return start_sample, new_end_sample
+
+def clip_audio(y, sr, start_time, duration_to_remove, align=1):
+    start_sample, new_end_sample = clip_bounds(len(y), sr, start_time, duration_to_remove, align)
     return y[start_sample:new_end_sample]
 
 def process_directory(input_dir):
@@ -53,7 +59,8 @@ def process_directory(input_dir):
                 # Get start time of first segment and calculate last segment duration
                 first_segment_start = segments[1][0]
                 last_segment_end = segments[-2][1]
-                total_duration = len(librosa.load(file_path, sr=None)[0]) / librosa.get_samplerate(file_path)
+                sr, num_samples = wav_reader.info(file_path)
+                total_duration = num_samples / sr
                 last_segment_duration = total_duration - last_segment_end
                 
                 all_segments_info.append((first_segment_start, last_segment_duration))
@@ -80,29 +87,46 @@ def main(input_dir, output_dir, manual_start=None, manual_duration=None):
         print(f"Average Start Time: {avg_start_time:.2f} seconds")
         print(f"Average Last Segment Duration: {avg_last_segment_duration:.2f} seconds")
 
+    # Only needed for writing the clipped files
+    import soundfile as sf
+
     # Now clip each audio file based on provided or calculated values
     for filename in os.listdir(input_dir):
         if filename.endswith('.wav'):
             file_path = os.path.join(input_dir, filename)
-            y, sr = librosa.load(file_path, sr=None)
+            # 16-bit PCM files are memory mapped, so only the clipped samples are read
+            audio = wav_reader.open_audio(file_path)
+            sr = audio.samplerate
 
             # Clip from average or manual values
-            clipped_audio = clip_audio(y, sr, avg_start_time, avg_last_segment_duration)
+            start_sample, end_sample = clip_bounds(audio.frames, sr, avg_start_time, avg_last_segment_duration, feature_store.BLOCK)
+            if isinstance(audio, wav_reader.WavFile):
+                clipped_audio = audio.int16(start_sample, end_sample)
+                subtype = "PCM_16"
+            else:
+                # Other formats are kept as float so that the clip holds the samples of the source unchanged
+                clipped_audio = audio.read(start_sample, end_sample, "float32")
+                subtype = "FLOAT"
 
             # Save clipped audio to output directory
             os.makedirs(output_dir, exist_ok=True)
             output_file_path = os.path.join(output_dir, f"clipped_{filename}")
-            sf.write(output_file_path, clipped_audio, sr)
+            sf.write(output_file_path, clipped_audio, sr, subtype=subtype)
 
-if __name__ == "__main__":
-    if len(sys.argv) < 3 or len(sys.argv) > 5:
-        print("Usage: python segment_audio.py <input_directory> <output_directory> [<start_time> <last_segment_duration>]")
-        sys.exit(1)
+            # Record the clip so that its features can be taken from the source file
+            feature_store.record_clip(output_file_path, file_path, start_sample, len(clipped_audio))
 
-    input_directory = sys.argv[1]
-    output_directory = sys.argv[2]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clip the music at the start and end of the .wav files of a directory.")
+    parser.add_argument("input_directory", help="Directory containing .wav files.")
+    parser.add_argument("output_directory", help="Directory to save the clipped .wav files.")
+    parser.add_argument("start_time", type=float, nargs="?",
+                        help="Seconds to clip at the start of every file (optional, detected from the audio if omitted).")
+    parser.add_argument("last_segment_duration", type=float, nargs="?",
+                        help="Seconds to clip at the end of every file (required with start_time).")
+    args = parser.parse_args()
 
-    manual_start_time = float(sys.argv[3]) if len(sys.argv) == 5 else None
-    manual_last_segment_duration = float(sys.argv[4]) if len(sys.argv) == 5 else None
+    if (args.start_time is None) != (args.last_segment_duration is None):
+        parser.error("start_time and last_segment_duration must be given together")
 
-    main(input_directory, output_directory, manual_start=manual_start_time, manual_duration=manual_last_segment_duration)
+    main(args.input_directory, args.output_directory, manual_start=args.start_time, manual_duration=args.last_segment_duration)
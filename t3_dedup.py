@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+import numpy as np
+
+import feature_store
+
+NUM_PERM = 128
+BANDS = 32                      # 32 bands of 4 rows: pairs above ~0.45 similarity become candidates
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# Fixed permutations, so that signatures stay comparable across runs
+_rng = np.random.RandomState(1)
+PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+# Function for the MinHash signature of a set of 32-bit shingle hashes
+
+def minhash(shingles):
+    """
+    Returns:
+    - numpy uint32 array of NUM_PERM minimum hash values (all ones for an empty set).
+    """
+    shingles = np.unique(np.asarray(shingles, dtype=np.uint64))
+    if len(shingles) == 0:
+        return np.full(NUM_PERM, 0xFFFFFFFF, dtype=np.uint32)
+    hashes = (np.outer(shingles, PERM_A) + PERM_B) % MERSENNE_PRIME & np.uint64(0xFFFFFFFF)
+    return hashes.min(axis=0).astype(np.uint32)
+
+
+def similarity(signature, other):
+    """Estimate the Jaccard similarity of two sets from their signatures"""
+    return float(np.mean(signature == other))
+
+
+# Function for the shingles of a transcription
+
+def text_shingles(text, n=5):
+    """
+    Hash every run of `n` consecutive words of the normalized text to 32 bits.
+    """
+    words = re.sub(r"[^\w\s]", " ", text.lower()).split()
+    grams = [" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))] if words else []
+    return [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams]
+
+
+# Function for the shingles of an audio file, from the cached blocks that t2_process.segment_audio frames are built from
+
+def audio_shingles(file_path, blocks_per_window=32, bits=20, floor=0.05, margin=0.3):
+    """
+    Fingerprint the coarse energy envelope of an audio file.
+
+    The 512-sample block energies are summed over overlapping windows of about a
+    second (at 16 kHz), one starting at every block. Each window gives one bit
+    telling whether the log energy rises by more than `margin` towards the next
+    window, and `bits` such bits spaced a window apart form one shingle. Since a
+    window starts at every block, copies that are clipped differently line up
+    within half a block and still share their shingles. The `floor` (relative
+    to the mean energy) keeps noise in silences from flipping bits.
+    """
+    energy = feature_store.block_power(file_path)
+    cumulative = np.concatenate(([0], np.cumsum(energy)))
+    window_energy = cumulative[blocks_per_window:] - cumulative[:-blocks_per_window]
+    if len(window_energy) == 0:
+        return []
+    envelope = np.log(window_energy + floor * window_energy.mean() + 1e-10)
+    rises = (envelope[blocks_per_window:] - envelope[:-blocks_per_window] > margin).astype(np.uint32)
+    span = blocks_per_window * (bits - 1) + 1
+    if len(rises) < span:
+        return []
+    weights = np.uint32(1) << np.arange(bits, dtype=np.uint32)
+    windows = np.lib.stride_tricks.sliding_window_view(rises, span)[:, ::blocks_per_window]
+    return np.unique((windows * weights).sum(axis=1)).tolist()
+
+
+# Class for a persistent locality-sensitive hashing index of lecture signatures
+
+class DedupIndex:
+    """SQLite-backed MinHash LSH index of audio and text signatures"""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path of the SQLite database holding the index (created if missing)
+        """
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS lectures (
+                id INTEGER PRIMARY KEY,
+                audio_filepath TEXT UNIQUE,
+                text_filepath TEXT,
+                audio_signature BLOB,
+                text_signature BLOB
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                kind TEXT,
+                band INTEGER,
+                hash INTEGER,
+                lecture_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (kind, band, hash);
+        """)
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM lectures").fetchone()[0]
+
+    @staticmethod
+    def _band_hashes(signature):
+        rows = signature.reshape(BANDS, ROWS)
+        return [int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(), "little", signed=True) for row in rows]
+
+    def contains(self, audio_filepath: str) -> bool:
+        return self.db.execute("SELECT 1 FROM lectures WHERE audio_filepath = ?", (audio_filepath,)).fetchone() is not None
+
+    def add(self, audio_filepath, text_filepath, audio_signature, text_signature) -> None:
+        cursor = self.db.execute(
+            "INSERT INTO lectures (audio_filepath, text_filepath, audio_signature, text_signature) VALUES (?, ?, ?, ?)",
+            (audio_filepath, text_filepath,
+             None if audio_signature is None else audio_signature.tobytes(),
+             None if text_signature is None else text_signature.tobytes()))
+        for kind, signature in (("audio", audio_signature), ("text", text_signature)):
+            if signature is not None:
+                self.db.executemany("INSERT INTO bands (kind, band, hash, lecture_id) VALUES (?, ?, ?, ?)",
+                                    [(kind, band, h, cursor.lastrowid) for band, h in enumerate(self._band_hashes(signature))])
+
+    def query(self, kind: str, signature, threshold: float) -> list:
+        """
+        Find indexed lectures whose `kind` ("audio" or "text") signature is similar.
+
+        Only lectures sharing at least one band with `signature` are compared.
+
+        Returns:
+            List of (audio file path, estimated similarity), most similar first
+        """
+        if signature is None:
+            return []
+        candidates = set()
+        for band, h in enumerate(self._band_hashes(signature)):
+            rows = self.db.execute("SELECT lecture_id FROM bands WHERE kind = ? AND band = ? AND hash = ?", (kind, band, h))
+            candidates.update(row[0] for row in rows)
+
+        matches = []
+        for lecture_id in candidates:
+            path, blob = self.db.execute(f"SELECT audio_filepath, {kind}_signature FROM lectures WHERE id = ?", (lecture_id,)).fetchone()
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((path, score))
+        return sorted(matches, key=lambda m: -m[1])
+
+
+# Function for indexing a directory of lectures and reporting the duplicates
+
+def find_duplicates(audio_dir, text_dir, db_path, report_file, audio_threshold=0.5, text_threshold=0.7):
+    if not os.path.isdir(audio_dir):
+        print(f"Error: {audio_dir} does not exist or is not a directory")
+        return
+
+    duplicates = []
+    with DedupIndex(db_path) as index:
+        for audio_file in sorted(os.listdir(audio_dir)):
+            match = re.search(r"(\d+)(?=\.wav$)", audio_file)
+            if match is None:
+                continue
+            # Absolute paths keep the index and the report valid from any working directory
+            audio_filepath = os.path.abspath(os.path.join(audio_dir, audio_file))
+            if index.contains(audio_filepath):
+                continue
+
+            # Text files are matched by lecture number, as in t4_manifest.py
+            text_filepath = os.path.abspath(os.path.join(text_dir, "lec" + str(int(match.group(1))) + ".txt"))
+            text_signature = None
+            if os.path.exists(text_filepath):
+                with open(text_filepath, 'r', encoding='utf-8') as f:
+                    shingles = text_shingles(f.read())
+                # Empty sets all share the same signature, so they are left out of the comparison
+                text_signature = minhash(shingles) if shingles else None
+            else:
+                text_filepath = None
+
+            try:
+                shingles = audio_shingles(audio_filepath)
+                audio_signature = minhash(shingles) if shingles else None
+            except Exception as e:
+                print(f"Error: Could not fingerprint {audio_filepath} - {e}")
+                continue
+
+            audio_matches = index.query("audio", audio_signature, audio_threshold)
+            text_matches = index.query("text", text_signature, text_threshold)
+            if audio_matches or text_matches:
+                best = max(audio_matches + text_matches, key=lambda m: m[1])
+                duplicates.append({
+                    "audio_filepath": audio_filepath,
+                    "text_filepath": text_filepath,
+                    "duplicate_of": best[0],
+                    "audio_similarity": audio_matches[0][1] if audio_matches else None,
+                    "text_similarity": text_matches[0][1] if text_matches else None,
+                })
+                print(f"{audio_filepath} duplicates {best[0]}")
+                continue
+
+            index.add(audio_filepath, text_filepath, audio_signature, text_signature)
+        num_indexed = len(index)
+
+    try:
+        with open(report_file, "w") as f:
+            for entry in duplicates:
+                json.dump(entry, f, ensure_ascii=False)
+                f.write("\n")
+    except IOError as e:
+        print(f"Error: Failed to write duplicates to {report_file} - {e}")
+
+    print(f"Found {len(duplicates)} duplicates; the index holds {num_indexed} lectures")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Find lectures whose audio or transcript duplicates an already indexed lecture.")
+    parser.add_argument("audio_dir", help="Directory containing .wav files.")
+    parser.add_argument("text_dir", help="Directory containing text files.")
+    parser.add_argument("db_path", help="Index database shared across courses (created if missing).")
+    parser.add_argument("report_file", help="File name to save the duplicates (.jsonl), for t4_manifest.py --exclude.")
+    parser.add_argument("--audio_threshold", type=float, default=0.5, help="Minimum audio fingerprint similarity of a duplicate (default 0.5).")
+    parser.add_argument("--text_threshold", type=float, default=0.7, help="Minimum transcript similarity of a duplicate (default 0.7).")
+    args = parser.parse_args()
+
+    find_duplicates(args.audio_dir, args.text_dir, args.db_path, args.report_file,
+                    args.audio_threshold, args.text_threshold)
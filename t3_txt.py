@@ -1,8 +1,6 @@
 import os
-import fitz  # PyMuPDF
 import re
 import string
-from num2words import num2words
 
 
 def extract_text_from_pdf(pdf_path):
@@ -19,6 +17,10 @@ def extract_text_from_pdf(pdf_path):
     Returns:
     - Extracted text as a string.
     """
+    # Imported here so that the script starts without loading PyMuPDF and num2words
+    import fitz  # PyMuPDF
+    from num2words import num2words
+
     text = ""
     try:
         doc = fitz.open(pdf_path)
@@ -1,6 +1,6 @@
 import os
 import json
-import soundfile as sf
+import wav_reader
 import re
 import argparse
 
@@ -19,16 +19,31 @@ def read_txt_file(file_path):
 
 def get_audio_duration(file_path):
     try:
-        with sf.SoundFile(file_path) as audio:
-            return len(audio) / audio.samplerate
+        # Only the header is read for .wav files
+        sr, num_samples = wav_reader.info(file_path)
+        return num_samples / sr
     except Exception as e:
         print(f"Error: Could not get duration for {file_path} - {e}")  # Detailed error for audio processing
         return None
 
 
+# Function for reading the audio files reported as duplicates by t3_dedup.py
+
+def read_excluded(exclude_file):
+    excluded = set()
+    try:
+        with open(exclude_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    excluded.add(os.path.abspath(json.loads(line)["audio_filepath"]))
+    except (OSError, json.JSONDecodeError, KeyError) as e:
+        print(f"Error: Could not read the excluded files from {exclude_file} - {e}")
+    return excluded
+
+
 # Function for creating the JSON file in the required format
 
-def write_json(audio_dir, text_dir, file_name = "train_manifest.jsonl"):
+def write_json(audio_dir, text_dir, file_name = "train_manifest.jsonl", exclude_file = None):
 
     if not os.path.isdir(audio_dir):
         print(f"Error: {audio_dir} does not exist or is not a directory")
@@ -38,6 +53,7 @@ def write_json(audio_dir, text_dir, file_name = "train_manifest.jsonl"):
         return
 
     manifest_data = []
+    excluded = read_excluded(exclude_file) if exclude_file else set()
 
     # Iterate through all .wav audio files in the directory
 
@@ -46,6 +62,9 @@ def write_json(audio_dir, text_dir, file_name = "train_manifest.jsonl"):
             print("Error: The file " + audio_file + " is not in the desired format")
             continue
 
+        if os.path.abspath(os.path.join(audio_dir, audio_file)) in excluded:
+            continue
+
         # Get the required details of the audio and text files
 
         lec_num = int(re.search(r"(\d+)(?=\.wav$)", audio_file).group(1))
@@ -86,6 +105,7 @@ if __name__ == "__main__":
     parser.add_argument("audio_dir", help="Directory containing audio files.")
     parser.add_argument("text_dir", help="Directory containing text files.")
     parser.add_argument("file_name", help="File name to save the training manifest data (.jsonl).")
+    parser.add_argument("--exclude", help="Duplicates report (.jsonl) from t3_dedup.py; the audio files listed in it are skipped.")
     args = parser.parse_args()
 
-    write_json(args.audio_dir, args.text_dir, args.file_name)
+    write_json(args.audio_dir, args.text_dir, args.file_name, args.exclude)
@@ -0,0 +1,215 @@
+import os
+import json
+import argparse
+import numpy as np
+
+import feature_store
+import wav_reader
+from manifest import Manifest
+
+
+# Function for computing the RMS of consecutive non-overlapping frames from the feature store
+
+def frame_rms(file_path, frame_length=512, start_time=0.0, end_time=None):
+    """
+    Compute the RMS of each frame of `frame_length` samples in an audio file.
+
+    Args:
+    - file_path: Path to the audio file.
+    - frame_length: Number of samples per frame.
+    - start_time: Time (in seconds) at which the analysis starts, rounded to a frame.
+    - end_time: Time (in seconds) at which the analysis stops (end of file if None).
+
+    Returns:
+    - Tuple of (rms per frame as a numpy array, sampling rate).
+    """
+    sr = wav_reader.info(file_path)[0]
+    power = feature_store.block_power(file_path, frame_length)
+    first = int(round(start_time * sr / frame_length))
+    last = len(power) if end_time is None else int(end_time * sr / frame_length)
+    return np.sqrt(power[first:max(first, last)] / frame_length), sr
+
+
+# Function for finding the voiced (non-silent) frame intervals
+
+def voiced_intervals(rms, top_db=30):
+    """
+    Find runs of frames whose RMS lies within `top_db` decibels of the loudest frame.
+
+    Returns:
+    - List of (start_frame, end_frame) tuples, end exclusive.
+    """
+    if len(rms) == 0 or rms.max() <= 0:
+        return []
+    db = 20 * np.log10(np.maximum(rms, 1e-10) / rms.max())
+    voiced = np.concatenate(([False], db > -top_db, [False]))
+    edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+    return list(zip(edges[0::2], edges[1::2]))
+
+
+# Function for merging voiced intervals into segments that are cut only at silences
+
+def group_intervals(intervals, max_frames, min_frames):
+    """
+    Greedily merge consecutive voiced intervals into segments no longer than `max_frames`.
+    Cuts are placed in the silences between intervals; a single interval longer than
+    `max_frames` is split into equal parts. Segments shorter than `min_frames` are dropped.
+
+    Returns:
+    - List of (start_frame, end_frame) tuples, end exclusive.
+    """
+    segments = []
+    for start, end in intervals:
+        if segments and end - segments[-1][0] <= max_frames:
+            segments[-1] = (segments[-1][0], end)
+            continue
+        n_parts = int(np.ceil((end - start) / max_frames))
+        bounds = np.linspace(start, end, n_parts + 1).astype(int)
+        segments.extend(zip(bounds[:-1], bounds[1:]))
+
+    return [(int(s), int(e)) for s, e in segments if e - s >= min_frames]
+
+
+# Text assigners take the transcription and the segment durations and return one text per segment
+
+def proportional_text(text, durations):
+    """
+    Split the words of `text` across segments in proportion to the segment durations.
+    """
+    words = text.split()
+    if not durations:
+        return []
+    cumulative = np.cumsum(durations) / sum(durations)
+    bounds = np.concatenate(([0], np.round(cumulative * len(words)).astype(int)))
+    return [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(len(durations))]
+
+
+TEXT_ASSIGNERS = {
+    "proportional": proportional_text,
+}
+
+
+# Function for splitting a single manifest entry into segment entries
+
+def segment_entry(entry, max_duration=20.0, min_duration=1.0, top_db=30, frame_length=512,
+                  clip_start=0.0, clip_end=0.0, assign_text=proportional_text):
+    """
+    Split one lecture-level manifest entry into utterance-sized entries.
+
+    Each returned entry points into the same audio file through `offset` and
+    `duration` (in seconds), so no audio is rewritten.
+
+    Args:
+    - entry: Manifest entry with `audio_filepath`, `duration` and `text`.
+    - max_duration: Maximum duration of a segment in seconds.
+    - min_duration: Segments shorter than this (in seconds) are dropped.
+    - top_db: Frames quieter than the loudest frame by this many decibels are silence.
+    - frame_length: Number of samples per analysis frame.
+    - clip_start: Seconds to skip at the start of the file (e.g. intro music).
+    - clip_end: Seconds to skip at the end of the file (e.g. outro music).
+    - assign_text: Callable mapping (text, durations) to one text per segment.
+
+    Returns:
+    - List of segment entries.
+    """
+    audio_path = entry["audio_filepath"]
+    end_time = None
+    if clip_end > 0:
+        sr, num_samples = wav_reader.info(audio_path)
+        end_time = num_samples / sr - clip_end
+
+    rms, sr = frame_rms(audio_path, frame_length, clip_start, end_time)
+    frame_dur = frame_length / sr
+    # frame_rms starts at the frame nearest to clip_start
+    clip_start = round(clip_start / frame_dur) * frame_dur
+    segments = group_intervals(voiced_intervals(rms, top_db),
+                               max_frames=int(max_duration / frame_dur),
+                               min_frames=int(np.ceil(min_duration / frame_dur)))
+
+    durations = [(end - start) * frame_dur for start, end in segments]
+    texts = assign_text(entry.get("text", ""), durations)
+
+    return [
+        {
+            "audio_filepath": audio_path,
+            "offset": round(clip_start + start * frame_dur, 4),
+            "duration": round(duration, 4),
+            "text": text,
+        }
+        for (start, _), duration, text in zip(segments, durations, texts)
+    ]
+
+
+# Function for reading only the samples of a segment entry
+
+def read_segment(entry, dtype='float32'):
+    """
+    Read the audio of a segment entry by seeking straight to its offset.
+    For 16-bit PCM .wav files only the samples of the segment are touched.
+
+    Returns:
+    - Tuple of (mono audio samples as a numpy array, sampling rate).
+    """
+    audio = wav_reader.open_audio(entry["audio_filepath"])
+    sr = audio.samplerate
+    start = int(round(entry.get("offset", 0) * sr))
+    frames = int(round(entry["duration"] * sr))
+    return audio.read(start, start + frames, dtype), sr
+
+
+# Function for creating the segment manifest from a lecture-level manifest
+
+def write_segments(json_path, output_file, text_assigner="proportional", **kwargs):
+    assign_text = TEXT_ASSIGNERS[text_assigner]
+    num_entries = 0
+    num_segments = 0
+
+    try:
+        with Manifest(json_path) as manifest, open(output_file, 'w') as f:
+            for entry in manifest:
+                audio_path = entry.get("audio_filepath")
+                if not audio_path or not os.path.exists(audio_path):
+                    print(f"Warning: Audio file {audio_path} not found")
+                    continue
+
+                try:
+                    segments = segment_entry(entry, assign_text=assign_text, **kwargs)
+                except Exception as e:
+                    print(f"Error segmenting audio file {audio_path}: {e}")
+                    continue
+
+                for segment in segments:
+                    json.dump(segment, f, ensure_ascii=False)
+                    f.write("\n")
+                num_entries += 1
+                num_segments += len(segments)
+    except FileNotFoundError:
+        print(f"Error: The file {json_path} was not found.")
+        return
+    except IOError as e:
+        print(f"Error: Failed to write segments to {output_file} - {e}")
+        return
+
+    if num_segments == 0:
+        print("Error: No segments were generated")
+    else:
+        print(f"Wrote {num_segments} segments from {num_entries} audio files to {output_file}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Split a lecture-level manifest into utterance-sized segments referenced by offset and duration.")
+    parser.add_argument("json_path", help="Training manifest file (.jsonl) to segment.")
+    parser.add_argument("output_file", help="File name to save the segment manifest (.jsonl).")
+    parser.add_argument("--max_duration", type=float, default=20.0, help="Maximum segment duration in seconds (default 20).")
+    parser.add_argument("--min_duration", type=float, default=1.0, help="Minimum segment duration in seconds (default 1).")
+    parser.add_argument("--top_db", type=float, default=30, help="Threshold in decibels below the loudest frame that counts as silence (default 30).")
+    parser.add_argument("--clip_start", type=float, default=0.0, help="Seconds to skip at the start of each audio file (default 0).")
+    parser.add_argument("--clip_end", type=float, default=0.0, help="Seconds to skip at the end of each audio file (default 0).")
+    parser.add_argument("--text_assigner", choices=sorted(TEXT_ASSIGNERS), default="proportional",
+                        help="How the transcription is distributed over segments (default 'proportional').")
+    args = parser.parse_args()
+
+    write_segments(args.json_path, args.output_file, text_assigner=args.text_assigner,
+                   max_duration=args.max_duration, min_duration=args.min_duration, top_db=args.top_db,
+                   clip_start=args.clip_start, clip_end=args.clip_end)
@@ -1,111 +1,123 @@
-import dash
-from dash import dcc, html
-import plotly.express as px
-import pandas as pd
-import json
 import sys
 import os
+import argparse
 
-# Ensure the JSONL file is provided as a command-line argument
-if len(sys.argv) != 2:
-    print("Usage: python app.py <path_to_jsonl_file>")
-    sys.exit(1)
-
-jsonl_file = sys.argv[1]
-
-if not os.path.isfile(jsonl_file):
-    print(f"Error: The file {jsonl_file} does not exist.")
-    sys.exit(1)
-
-# Read the JSONL file and convert it to a pandas DataFrame
-data = []
-try:
-    with open(jsonl_file, 'r') as file:
-        for line in file:
-            try:
-                data.append(json.loads(line))
-            except json.JSONDecodeError:
-                print(f"Warning: Skipping malformed JSON line in {jsonl_file}")
-except Exception as e:
-    print(f"Error reading JSONL file: {e}")
-    sys.exit(1)
-
-# Check if data is empty
-if not data:
-    print(f"Error: The data from {jsonl_file} is empty.")
-    sys.exit(1)
-
-# Convert the list of JSON objects to a DataFrame
-df = pd.DataFrame(data[1:])
-
-# Add derived columns
-df['duration_minutes'] = df['duration'] / 60
-
-# Create Dash app
-app = dash.Dash(__name__)
-
-num_files = len(data) -1
-
-# Obtain the aggregate numbers to be used for display
-total_dur_seconds = data[0]["aggregates"]["total duration in seconds"]
-total_dur_hours = data[0]["aggregates"]["total duration in hours"]
-vocab_size = data[0]["aggregates"]["vocabulary size"]
-alphabet_size = data[0]["aggregates"]["alphabet size"]
-alphabet = data[0]["aggregates"]["alphabet"]
-vocabulary = data[0]["aggregates"]["vocabulary"]
-total_segments = data[0]["aggregates"]["total number of segments"]
-avg_segment_dur = data[0]["aggregates"]["average segment duration"]
-
-# Generate the string of alphabets to be displayed
-alphabet_print = ""
-for character in alphabet[:-1]:
-    alphabet_print += character + ", " 
-alphabet_print += alphabet[-1]
-
-# Layout of the dashboard
-app.layout = html.Div([
-    html.H1("Audio Statistics Visualization"),
-
-    # Display the aggregate statistics
-    html.Div([
-        html.H3("Global Statistics"),
+from manifest import Manifest
+from token_stats import TokenIndex
+
+
+# Function for building and serving the dashboard of a manifest with metrics
+
+def main(jsonl_file):
+    if not os.path.isfile(jsonl_file):
+        print(f"Error: The file {jsonl_file} does not exist.")
+        sys.exit(1)
+
+    # Imported here so that the script starts without loading Dash, Plotly and pandas
+    import dash
+    from dash import dcc, html
+    import plotly.express as px
+    import pandas as pd
+
+    # Read the JSONL file through its index; the transcriptions are not needed for the plots
+    try:
+        with Manifest(jsonl_file) as manifest:
+            aggregates = manifest.header
+            data = list(manifest.iter_entries(text="skip"))
+    except Exception as e:
+        print(f"Error reading JSONL file: {e}")
+        sys.exit(1)
+
+    # Check if data is empty
+    if not data or aggregates is None:
+        print(f"Error: The data from {jsonl_file} is empty.")
+        sys.exit(1)
+
+    # Convert the list of JSON objects to a DataFrame
+    df = pd.DataFrame(data)
+
+    # Add derived columns
+    df['duration_minutes'] = df['duration'] / 60
+
+    # Create Dash app
+    app = dash.Dash(__name__)
+
+    num_files = len(data)
+
+    # Obtain the aggregate numbers to be used for display
+    total_dur_seconds = aggregates["total duration in seconds"]
+    total_dur_hours = aggregates["total duration in hours"]
+    vocab_size = aggregates["vocabulary size"]
+    alphabet_size = aggregates["alphabet size"]
+    alphabet = aggregates["alphabet"]
+    total_segments = aggregates["total number of segments"]
+    avg_segment_dur = aggregates["average segment duration"]
+
+    # Generate the string of alphabets to be displayed
+    alphabet_print = ""
+    for character in alphabet[:-1]:
+        alphabet_print += character + ", " 
+    alphabet_print += alphabet[-1]
+
+    # Words that look like two words glued together, from the token index next to the JSONL file
+    glued_print = "not available"
+    token_index_path = os.path.join(os.path.dirname(jsonl_file), aggregates.get("token index", ""))
+    if os.path.isfile(token_index_path):
+        glued = TokenIndex(token_index_path).glued_words()
+        glued_print = f"{len(glued)} words, e.g. " + ", ".join(f"{word} ({count})" for word, count, _, _ in glued[:10])
+
+    # Layout of the dashboard
+    app.layout = html.Div([
+        html.H1("Audio Statistics Visualization"),
+
+        # Display the aggregate statistics
         html.Div([
-            html.P(f"Total number of audio files: {num_files}"),
-            html.P(f"Total Duration: {total_dur_seconds:.0f} seconds ({total_dur_hours:.2f} hours)"),
-            html.P(f"Vocabulary size: {vocab_size} words"),
-            html.P(f"Alphabet size: {alphabet_size} characters"),
-            html.P(f"Alphabet: {alphabet_print}"),
-            html.P(f"Total number of segments: {total_segments}"),
-            html.P(f"Average duration of segments: {avg_segment_dur}"),
+            html.H3("Global Statistics"),
+            html.Div([
+                html.P(f"Total number of audio files: {num_files}"),
+                html.P(f"Total Duration: {total_dur_seconds:.0f} seconds ({total_dur_hours:.2f} hours)"),
+                html.P(f"Vocabulary size: {vocab_size} words"),
+                html.P(f"Alphabet size: {alphabet_size} characters"),
+                html.P(f"Alphabet: {alphabet_print}"),
+                html.P(f"Possibly glued words: {glued_print}"),
+                html.P(f"Total number of segments: {total_segments}"),
+                html.P(f"Average duration of segments: {avg_segment_dur}"),
+            ]),
         ]),
-    ]),
-
-    # Graphs to visualize duration, number of words, number of characters, number of segments, and average duration of segments
-    html.Div([
-        dcc.Graph(
-            id='duration_histogram',
-            figure=px.histogram(df, x='duration', nbins=20, title="Duration per Audio File (Seconds)").update_layout(xaxis_title="Duration (Seconds)", yaxis_title="Number of audio files")
-        ),
-        dcc.Graph(
-            id='words_histogram',
-            figure=px.histogram(df, x='num_words', nbins= 20, title="Number of Words per Audio File").update_layout(xaxis_title="Number of words", yaxis_title="Number of audio files")
-        ),
-        dcc.Graph(
-            
-            id='characters_histogram',
-            figure=px.histogram(df, x='num_char', nbins=20, title="Number of Characters per Audio File").update_layout(xaxis_title="Number of characters", yaxis_title="Number of audio files")
-        ),
-        dcc.Graph(
-            id='segments_histogram',
-            figure=px.histogram(df, x='num_segments', nbins=20, title="Number of Segments per Audio File").update_layout(xaxis_title="Number of segements", yaxis_title="Number of audio files")
-        ),
-        dcc.Graph(
-            id='segments_dur_histogram',
-            figure=px.histogram(df, x='avg_segment_dur', nbins=20, title="Average Duration of Segments per Audio File").update_layout(xaxis_title="Average duration (seconds)", yaxis_title="Number of audio files")
-        ),
-    ]),
-])
-
-# Run the app
-if __name__ == '__main__':
+
+        # Graphs to visualize duration, number of words, number of characters, number of segments, and average duration of segments
+        html.Div([
+            dcc.Graph(
+                id='duration_histogram',
+                figure=px.histogram(df, x='duration', nbins=20, title="Duration per Audio File (Seconds)").update_layout(xaxis_title="Duration (Seconds)", yaxis_title="Number of audio files")
+            ),
+            dcc.Graph(
+                id='words_histogram',
+                figure=px.histogram(df, x='num_words', nbins= 20, title="Number of Words per Audio File").update_layout(xaxis_title="Number of words", yaxis_title="Number of audio files")
+            ),
+            dcc.Graph(
+
+                id='characters_histogram',
+                figure=px.histogram(df, x='num_char', nbins=20, title="Number of Characters per Audio File").update_layout(xaxis_title="Number of characters", yaxis_title="Number of audio files")
+            ),
+            dcc.Graph(
+                id='segments_histogram',
+                figure=px.histogram(df, x='num_segments', nbins=20, title="Number of Segments per Audio File").update_layout(xaxis_title="Number of segements", yaxis_title="Number of audio files")
+            ),
+            dcc.Graph(
+                id='segments_dur_histogram',
+                figure=px.histogram(df, x='avg_segment_dur', nbins=20, title="Average Duration of Segments per Audio File").update_layout(xaxis_title="Average duration (seconds)", yaxis_title="Number of audio files")
+            ),
+        ]),
+    ])
+
+    # Run the app
     app.run_server(debug=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Visualize the audio and text metrics of a manifest written by t5_json.py.")
+    parser.add_argument("jsonl_file", help="Manifest file with metrics (.jsonl), e.g. the output of t5_json.py.")
+    args = parser.parse_args()
+
+    main(args.jsonl_file)
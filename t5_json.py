@@ -1,19 +1,16 @@
-import librosa
-import soundfile as sf
 import os
 import json
+import shutil
+
+import feature_store
+import wav_reader
+from manifest import Manifest
+from token_stats import TokenStats
 
 # Load the audio file
-def update_json(json_path, output_file):
+def update_json(json_path, output_file, top_db=20):
     try:
-        with open(json_path, 'r') as file:
-            data = []
-            for line in file:
-                try:
-                    data.append(json.loads(line))
-                except json.JSONDecodeError as e:
-                    print(f"Error decoding JSON on line {file.tell()}: {e}")
-                    continue
+        manifest = Manifest(json_path)
     except FileNotFoundError:
         print(f"Error: The file {json_path} was not found.")
         return
@@ -21,79 +18,102 @@ def update_json(json_path, output_file):
         print(f"Error reading the file {json_path}: {e}")
         return
 
-    vocabulary = set()
-    alphabet = set()
+    token_stats = TokenStats()
     total_duration = 0
     total_segments = 0
     total_segment_dur = 0
 
-    for i,entry in enumerate(data):
+    # Updated entries are streamed to a temporary file since the aggregates line has to come first
+    entries_file = output_file + ".entries.tmp"
+    try:
+        entries_out = open(entries_file, "w")
+    except IOError as e:
+        print(f"Error writing to {output_file}: {e}")
+        manifest.close()
+        return
+
+    def write_entry(entry):
+        json.dump(entry, entries_out, ensure_ascii=False)
+        entries_out.write("\n")
+
+    for i,entry in enumerate(manifest):
         audio_path = entry['audio_filepath'] 
 
         if not audio_path or not os.path.exists(audio_path):
             print(f"Warning: Audio file {audio_path} not found for entry {i}")
+            write_entry(entry)
             continue
 
+        # Frame RMS comes from the feature store, so the audio is only decoded the first time
         try:
-            y, sr = librosa.load(audio_path, sr=None)  # sr=None to preserve the original sampling rate
+            sr = wav_reader.info(audio_path)[0]
+            intervals = feature_store.split(audio_path, top_db=top_db)
         except Exception as e:
             print(f"Error loading audio file {audio_path}: {e}")
+            write_entry(entry)
             continue
 
-        intervals = librosa.effects.split(y, top_db=20)
         segment_durations = [(end-start)/sr for start,end in intervals]
 
         # Update the json entry with new data fields for number of characters and words
         split_text = entry["text"].split()
-        data[i]["num_words"] = len(split_text)
-        data[i]["num_char"] = len(entry["text"])
+        entry["num_words"] = len(split_text)
+        entry["num_char"] = len(entry["text"])
         
-        # Add to the global vocabulary and alphabet
-        entry_vocab = set(split_text)
-        vocabulary.update(entry_vocab)
-        entry_alphabet = set(entry["text"])
-        alphabet.update(entry_alphabet)
+        # Add to the global word and character frequencies
+        token_stats.update(entry["text"])
 
         # add to global segment calculation
         total_segment_dur += sum(segment_durations)
         total_segments += len(segment_durations)
 
         # Update the json entry with new data fields for segment information
-        data[i]["num_segments"] = len(intervals)
+        entry["num_segments"] = len(intervals)
         if len(intervals) > 0:
-            data[i]["avg_segment_dur"] = sum(segment_durations) / len(segment_durations)
+            entry["avg_segment_dur"] = sum(segment_durations) / len(segment_durations)
         else:
-            data[i]["avg_segment_dur"] = 0
+            entry["avg_segment_dur"] = 0
+
+
+        total_duration += entry["duration"]
+        write_entry(entry)
 
+    entries_out.close()
+    manifest.close()
 
-        total_duration += data[i]["duration"]
+    # The word and character frequencies are kept in a separate index instead of the aggregates line
+    token_index = os.path.splitext(output_file)[0] + ".tokens.npz"
+    try:
+        token_stats.save(token_index)
+    except IOError as e:
+        print(f"Error writing to {token_index}: {e}")
 
     aggregates = {
-        "vocabulary": list(vocabulary),
-        "vocabulary size": len(vocabulary),
-        "alphabet size": len(alphabet),
-        "alphabet": list(alphabet),
+        "token index": os.path.basename(token_index),
+        "vocabulary size": len(token_stats.words),
+        "alphabet size": len(token_stats.chars),
+        "alphabet": list(token_stats.chars),
         "total duration in seconds": total_duration,
         "total duration in hours": total_duration/(60*60),
         "total number of segments": total_segments,
-        "average segment duration": total_segment_dur/total_segments,
+        "average segment duration": total_segment_dur/total_segments if total_segments else 0,
     }
     
 
     try:
         with open(output_file, "w") as f:
-            if len(data) == 0:
+            if len(manifest) == 0:
                 print("Error: No entries were generated")
             
             json.dump({"aggregates": aggregates}, f, ensure_ascii=False)
             f.write("\n")
-            for entry in data:
-                # print(entry)
-                json.dump(entry, f, ensure_ascii=False)
-                f.write("\n")
+            with open(entries_file, "r") as entries_in:
+                shutil.copyfileobj(entries_in, f)
 
     except IOError as e:
         print(f"Error writing to {output_file}: {e}")
+    finally:
+        os.remove(entries_file)
 
 
 if __name__ == "__main__":
@@ -103,7 +123,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Update json to include new data metrics.")
     parser.add_argument("json_path", help="File containing json to be updated.")
     parser.add_argument("output_file", help="Path to save new json file.")
+    parser.add_argument("--top_db", type=float, default=20, help="Threshold in decibels below the loudest frame that counts as silence (default 20).")
     args = parser.parse_args()
 
     # Process PDFs
-    update_json(args.json_path, args.output_file)
\ No newline at end of file
+    update_json(args.json_path, args.output_file, args.top_db)
\ No newline at end of file
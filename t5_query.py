@@ -0,0 +1,210 @@
+import os
+import ast
+import argparse
+import operator
+import numpy as np
+
+from manifest import Manifest
+
+# Numeric metrics written by t5_json.py
+METRICS = ["duration", "num_words", "num_char", "num_segments", "avg_segment_dur"]
+
+
+# Function for converting a metric to a float, NaN when it is missing or not a number
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# Function for loading the numeric columns of a manifest, building the cache when it is missing or stale
+
+def load_columns(json_path, cache_path=None):
+    """
+    Return a dict of numpy arrays with one value per entry of the manifest.
+
+    Besides the metrics of t5_json.py it holds `chars_per_sec`, `words_per_sec`,
+    `course` (index into `course_names`, from the directory of each audio file)
+    and the byte range (`starts`, `ends`) of every entry. Missing or non-numeric
+    values, and all values of lines that cannot be decoded, are NaN.
+    """
+    cache_path = cache_path or json_path + ".columns.npz"
+    size = os.path.getsize(json_path)
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(json_path):
+            with np.load(cache_path) as data:
+                if int(data["manifest_size"]) == size and len(data["duration"]) == len(data["starts"]):
+                    return {name: data[name] for name in data.files}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    values = {name: [] for name in METRICS}
+    courses = []
+    with Manifest(json_path) as manifest:
+        starts = manifest.offsets[manifest.first:-1]
+        ends = manifest.offsets[manifest.first + 1:]
+        # Every line gets a row, so the columns stay aligned with the byte ranges
+        for i in range(len(manifest)):
+            try:
+                entry = manifest.lazy(i)
+            except (ValueError, TypeError) as e:
+                print(f"Error decoding JSON on line {i + manifest.first + 1} of {json_path}: {e}")
+                entry = {}
+            for name in METRICS:
+                values[name].append(to_float(entry.get(name)))
+            audio_filepath = entry.get("audio_filepath")
+            courses.append(os.path.basename(os.path.dirname(audio_filepath)) if isinstance(audio_filepath, str) else "")
+
+    columns = {name: np.array(values[name], dtype=np.float64) for name in METRICS}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns["chars_per_sec"] = columns["num_char"] / columns["duration"]
+        columns["words_per_sec"] = columns["num_words"] / columns["duration"]
+    course_names, course_codes = np.unique(np.array(courses, dtype=str), return_inverse=True)
+    columns["course"] = course_codes.astype(np.int32)
+    columns["course_names"] = course_names
+    columns["starts"] = starts
+    columns["ends"] = ends
+    columns["manifest_size"] = np.array(size, dtype=np.int64)
+
+    try:
+        np.savez(cache_path, **columns)
+    except OSError as e:
+        print(f"Warning: Could not save the column cache to {cache_path} - {e}")
+    return columns
+
+
+# Operators allowed in filter expressions
+BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.BitAnd: operator.and_, ast.BitOr: operator.or_,
+}
+COMPARE_OPS = {
+    ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+    ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+
+
+# Function for evaluating a filter expression into a boolean mask
+
+def evaluate(expression, columns):
+    """
+    Evaluate an expression such as "2 <= duration <= 20 and course in ['106106184']"
+    over the columns, element-wise.
+
+    Supported: column names, numbers, strings and lists (for `course`), + - * /,
+    comparisons (also chained), `in`/`not in`, and/or/not and & | ~.
+    """
+    num_entries = len(columns["starts"])
+    course_names = list(columns["course_names"])
+
+    def course_code(name):
+        return course_names.index(name) if name in course_names else -1
+
+    def is_course(node):
+        return isinstance(node, ast.Name) and node.id == "course"
+
+    def visit(node):
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Name):
+            if node.id not in columns or node.id in ("starts", "ends", "manifest_size", "course_names"):
+                raise ValueError(f"Unknown column '{node.id}'")
+            return columns[node.id]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return node.value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [visit(element) for element in node.elts]
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+            return BINARY_OPS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.Invert)):
+            return ~np.asarray(visit(node.operand), dtype=bool)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -visit(node.operand)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            mask = visit(node.values[0])
+            for value in node.values[1:]:
+                mask = combine(mask, visit(value))
+            return mask
+        if isinstance(node, ast.Compare):
+            mask = np.ones(num_entries, dtype=bool)
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                a, b = visit(left), visit(right)
+                # Courses are compared by name through their codes, with the column on either side
+                if is_course(left) and not is_course(right):
+                    b = [course_code(name) for name in b] if isinstance(b, list) else course_code(b)
+                elif is_course(right) and not is_course(left):
+                    a = [course_code(name) for name in a] if isinstance(a, list) else course_code(a)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if not isinstance(b, list):
+                        raise ValueError(f"The right side of 'in' must be a list in '{expression}'")
+                    result = np.isin(a, b)
+                    mask &= result if isinstance(op, ast.In) else ~result
+                elif type(op) in COMPARE_OPS:
+                    mask &= COMPARE_OPS[type(op)](a, b)
+                else:
+                    raise ValueError(f"Unsupported comparison in '{expression}'")
+                left = right
+            return mask
+        raise ValueError(f"Unsupported expression '{ast.unparse(node)}'")
+
+    mask = visit(ast.parse(expression, mode="eval"))
+    return np.broadcast_to(np.asarray(mask, dtype=bool), (num_entries,))
+
+
+# Function for copying the selected entries of a manifest
+
+def write_subset(json_path, columns, mask, output_file):
+    """
+    Copy the lines of the selected entries byte for byte, merging adjacent lines into one read.
+    """
+    selected = np.flatnonzero(mask)
+    if len(selected) == 0:
+        open(output_file, 'wb').close()
+        return
+    starts = columns["starts"][selected]
+    ends = columns["ends"][selected]
+    # A new run begins wherever an entry does not directly follow the previous one
+    breaks = np.flatnonzero(starts[1:] != ends[:-1]) + 1
+    run_starts = starts[np.concatenate(([0], breaks))]
+    run_ends = ends[np.concatenate((breaks - 1, [len(selected) - 1]))]
+
+    with open(json_path, 'rb') as source, open(output_file, 'wb') as f:
+        for start, end in zip(run_starts, run_ends):
+            source.seek(int(start))
+            remaining = int(end - start)
+            while remaining > 0:
+                chunk = source.read(min(remaining, 1 << 24))
+                f.write(chunk)
+                remaining -= len(chunk)
+            # The last line of the manifest may have no newline
+            if not chunk.endswith(b"\n"):
+                f.write(b"\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Select the entries of a manifest with a filter on the metrics of t5_json.py.")
+    parser.add_argument("json_path", help="Manifest file with metrics (.jsonl), e.g. the output of t5_json.py.")
+    parser.add_argument("where", help="Filter expression, e.g. \"2 <= duration <= 20 and 5 < chars_per_sec < 25\".")
+    parser.add_argument("-o", "--output_file", help="File name to save the selected entries (.jsonl). Only the count is printed if omitted.")
+    parser.add_argument("--course", nargs="+", help="Only keep entries from these courses (directory names of the audio files).")
+    args = parser.parse_args()
+
+    columns = load_columns(args.json_path)
+    try:
+        mask = evaluate(args.where, columns)
+        if args.course:
+            mask = mask & np.isin(columns["course_names"][columns["course"]], args.course)
+    except (ValueError, SyntaxError) as e:
+        print(f"Error: Invalid filter expression - {e}")
+        raise SystemExit(1)
+
+    selected_duration = np.nansum(columns["duration"][mask])
+    print(f"Selected {int(mask.sum())} of {len(mask)} entries ({selected_duration / 3600:.2f} hours)")
+
+    if args.output_file:
+        write_subset(args.json_path, columns, mask, args.output_file)
@@ -0,0 +1,250 @@
+import os
+import io
+import glob
+import tarfile
+import argparse
+import numpy as np
+import soundfile as sf
+
+from manifest import Manifest
+from t4_segment import read_segment
+
+# Record layout of the offset index stored next to every binary shard
+INDEX_DTYPE = np.dtype([
+    ("audio_offset", "<i8"),   # byte offset of the int16 samples in the shard
+    ("num_samples", "<i8"),
+    ("text_offset", "<i8"),    # byte offset of the utf-8 text in the shard
+    ("text_length", "<i8"),
+    ("sample_rate", "<i4"),
+])
+
+
+# Class for writing shards one after the other, rolling over once a shard is full
+
+class ShardWriter:
+    """Write (audio, text) pairs into sequential .bin and/or .tar shards"""
+
+    def __init__(self, output_dir: str, shard_size_mb: float = 1024, formats=("bin",)):
+        """
+        Args:
+            output_dir: Directory where the shards are written, replacing the shards of an earlier export
+            shard_size_mb: Approximate maximum size of a shard in megabytes
+            formats: Any of "bin" (memory-mappable blob with an offset index) and "tar"
+        """
+        self.output_dir = output_dir
+        self.shard_size = int(shard_size_mb * 1024 * 1024)
+        self.formats = formats
+        self.shard_number = -1
+        self.num_written = 0
+        self.bin_file = None
+        self.tar_file = None
+        self.index = []
+        os.makedirs(output_dir, exist_ok=True)
+        # Shards left over from an earlier export would otherwise be read back along with the new ones
+        for extension in (".bin", ".idx.npy", ".tar"):
+            for path in glob.glob(os.path.join(output_dir, f"shard-*{extension}")):
+                os.remove(path)
+
+    def _shard_path(self, extension: str) -> str:
+        return os.path.join(self.output_dir, f"shard-{self.shard_number:05d}{extension}")
+
+    def _open_next_shard(self) -> None:
+        self.close()
+        self.shard_number += 1
+        self.shard_bytes = 0
+        if "bin" in self.formats:
+            self.bin_file = open(self._shard_path(".bin"), "wb")
+        if "tar" in self.formats:
+            self.tar_file = tarfile.open(self._shard_path(".tar"), "w")
+
+    def write(self, audio: np.ndarray, sr: int, text: str) -> None:
+        """Append one entry with int16 samples `audio` and transcription `text`"""
+        audio = np.ascontiguousarray(audio, dtype="<i2")
+        text_bytes = text.encode("utf-8")
+        size = audio.nbytes + len(text_bytes)
+        if self.shard_number < 0 or (self.shard_bytes > 0 and self.shard_bytes + size > self.shard_size):
+            self._open_next_shard()
+
+        if self.bin_file is not None:
+            audio_offset = self.bin_file.tell()
+            self.bin_file.write(audio.tobytes())
+            text_offset = self.bin_file.tell()
+            self.bin_file.write(text_bytes)
+            self.index.append((audio_offset, len(audio), text_offset, len(text_bytes), sr))
+
+        if self.tar_file is not None:
+            key = f"{self.num_written:09d}"
+            wav = io.BytesIO()
+            sf.write(wav, audio, sr, format="WAV", subtype="PCM_16")
+            self._add_tar_member(f"{key}.wav", wav.getvalue())
+            self._add_tar_member(f"{key}.txt", text_bytes)
+
+        self.shard_bytes += size
+        self.num_written += 1
+
+    def _add_tar_member(self, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        self.tar_file.addfile(info, io.BytesIO(data))
+
+    def close(self) -> None:
+        """Flush the current shard and its index"""
+        if self.bin_file is not None:
+            self.bin_file.close()
+            np.save(self._shard_path(".idx.npy"), np.array(self.index, dtype=INDEX_DTYPE))
+            self.bin_file = None
+            self.index = []
+        if self.tar_file is not None:
+            self.tar_file.close()
+            self.tar_file = None
+
+
+# Class for random and streaming access to the binary shards
+
+class ShardReader:
+    """Read (audio, text) pairs from memory-mapped .bin shards"""
+
+    def __init__(self, shard_dir: str):
+        """
+        Args:
+            shard_dir: Directory containing shard-XXXXX.bin and shard-XXXXX.idx.npy files
+        """
+        self.shard_paths = sorted(glob.glob(os.path.join(shard_dir, "shard-*.bin")))
+        self.indexes = [np.load(path[:-len(".bin")] + ".idx.npy") for path in self.shard_paths]
+        self.shards = [None] * len(self.shard_paths)
+        # Global entry number at which every shard starts
+        self.starts = np.cumsum([0] + [len(index) for index in self.indexes])
+
+    def __len__(self) -> int:
+        return int(self.starts[-1])
+
+    def _shard(self, shard_number: int) -> np.memmap:
+        if self.shards[shard_number] is None:
+            path = self.shard_paths[shard_number]
+            if os.path.getsize(path) == 0:
+                self.shards[shard_number] = np.zeros(0, dtype=np.uint8)
+            else:
+                self.shards[shard_number] = np.memmap(path, dtype=np.uint8, mode="r")
+        return self.shards[shard_number]
+
+    def _read(self, shard_number: int, record) -> tuple:
+        shard = self._shard(shard_number)
+        audio_offset = int(record["audio_offset"])
+        audio = shard[audio_offset:audio_offset + 2 * int(record["num_samples"])].view("<i2")
+        text_offset = int(record["text_offset"])
+        text = bytes(shard[text_offset:text_offset + int(record["text_length"])]).decode("utf-8")
+        return audio, text
+
+    def __getitem__(self, i: int) -> tuple:
+        """
+        Returns:
+            Tuple of (int16 samples as a read-only view into the shard, text)
+        """
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Entry {i} out of range for {len(self)} entries")
+        shard_number = int(np.searchsorted(self.starts, i, side="right")) - 1
+        return self._read(shard_number, self.indexes[shard_number][i - self.starts[shard_number]])
+
+    def sample_rate(self, i: int) -> int:
+        shard_number = int(np.searchsorted(self.starts, i, side="right")) - 1
+        return int(self.indexes[shard_number][i - self.starts[shard_number]]["sample_rate"])
+
+    def stream(self, shuffle_buffer: int = 0, seed=None):
+        """
+        Yield (audio, text) pairs reading every shard sequentially.
+
+        Shards are visited in a random order and entries pass through a shuffle
+        buffer of `shuffle_buffer` entries; with 0 the entries come out in order.
+        """
+        rng = np.random.default_rng(seed)
+        order = rng.permutation(len(self.shard_paths)) if shuffle_buffer > 0 else range(len(self.shard_paths))
+        entries = (self._read(n, record) for n in order for record in self.indexes[n])
+        yield from shuffle_stream(entries, shuffle_buffer, rng)
+
+
+# Function for shuffling a stream with a bounded buffer
+
+def shuffle_stream(items, buffer_size, rng):
+    if buffer_size <= 0:
+        yield from items
+        return
+    buffer = []
+    for item in items:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        j = rng.integers(buffer_size)
+        yield buffer[j]
+        buffer[j] = item
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+# Function for streaming (audio, text) pairs out of tar shards
+
+def stream_tar_shards(shard_dir, shuffle_buffer=0, seed=None):
+    rng = np.random.default_rng(seed)
+    paths = sorted(glob.glob(os.path.join(shard_dir, "shard-*.tar")))
+    if shuffle_buffer > 0:
+        paths = [paths[i] for i in rng.permutation(len(paths))]
+
+    def entries():
+        for path in paths:
+            audio = None
+            # Stream mode reads the tar strictly sequentially
+            with tarfile.open(path, "r|") as tar:
+                for member in tar:
+                    data = tar.extractfile(member).read()
+                    if member.name.endswith(".wav"):
+                        audio, _ = sf.read(io.BytesIO(data), dtype="int16")
+                    elif member.name.endswith(".txt"):
+                        yield audio, data.decode("utf-8")
+
+    yield from shuffle_stream(entries(), shuffle_buffer, rng)
+
+
+# Function for packing the audio and text of a manifest into shards
+
+def export_shards(json_path, output_dir, shard_size_mb=1024, formats=("bin",)):
+    writer = ShardWriter(output_dir, shard_size_mb, formats)
+
+    try:
+        with Manifest(json_path) as manifest:
+            for entry in manifest:
+                audio_path = entry.get("audio_filepath")
+                if not audio_path or not os.path.exists(audio_path):
+                    print(f"Warning: Audio file {audio_path} not found")
+                    continue
+
+                try:
+                    audio, sr = read_segment(entry, dtype="int16")
+                except Exception as e:
+                    print(f"Error loading audio file {audio_path}: {e}")
+                    continue
+
+                writer.write(audio, sr, entry.get("text", ""))
+    except FileNotFoundError:
+        print(f"Error: The file {json_path} was not found.")
+    finally:
+        writer.close()
+
+    if writer.num_written == 0:
+        print("Error: No entries were exported")
+    else:
+        print(f"Exported {writer.num_written} entries into {writer.shard_number + 1} shards in {output_dir}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Pack the audio and text of a manifest into large sequential shards.")
+    parser.add_argument("json_path", help="Manifest file (.jsonl) to export.")
+    parser.add_argument("output_dir", help="Directory to save the shards.")
+    parser.add_argument("--shard_size_mb", type=float, default=1024, help="Approximate size of each shard in megabytes (default 1024).")
+    parser.add_argument("--format", choices=["bin", "tar", "both"], default="bin",
+                        help="'bin' for memory-mappable shards with an offset index, 'tar' for tar shards, or 'both' (default 'bin').")
+    args = parser.parse_args()
+
+    export_shards(args.json_path, args.output_dir, args.shard_size_mb,
+                  ("bin", "tar") if args.format == "both" else (args.format,))
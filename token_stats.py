@@ -0,0 +1,222 @@
+import argparse
+from bisect import bisect_left
+from collections import Counter
+
+import numpy as np
+
+from manifest import Manifest
+
+
+# Class for counting word and character frequencies incrementally
+
+class TokenStats:
+    """Word and character frequencies accumulated over manifest entries"""
+
+    def __init__(self):
+        self.words = Counter()
+        self.chars = Counter()
+        self.num_entries = 0
+
+    def update(self, text: str) -> None:
+        """Add the words and characters of one transcription"""
+        self.words.update(text.split())
+        self.chars.update(text)
+        self.num_entries += 1
+
+    def merge(self, other: "TokenStats") -> "TokenStats":
+        """Add the counts of another TokenStats, e.g. from another worker"""
+        self.words.update(other.words)
+        self.chars.update(other.chars)
+        self.num_entries += other.num_entries
+        return self
+
+    def save(self, path: str) -> None:
+        """
+        Save the counts as a compact index sorted by token.
+
+        Words are stored as one newline separated utf-8 blob next to an array
+        of counts, so the file stays small even for large vocabularies. Characters
+        are stored as code points, since any character can occur in a transcription.
+        """
+        words = sorted(self.words)
+        chars = sorted(self.chars)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                word_blob=np.frombuffer("\n".join(words).encode("utf-8"), dtype=np.uint8),
+                word_counts=np.array([self.words[w] for w in words], dtype=np.int64),
+                char_codes=np.array([ord(c) for c in chars], dtype=np.int32),
+                char_counts=np.array([self.chars[c] for c in chars], dtype=np.int64),
+                num_entries=np.array(self.num_entries, dtype=np.int64),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "TokenStats":
+        index = TokenIndex(path)
+        stats = cls()
+        stats.words = Counter(dict(zip(index.words, index.word_counts.tolist())))
+        stats.chars = Counter(dict(zip(index.chars, index.char_counts.tolist())))
+        stats.num_entries = index.num_entries
+        return stats
+
+
+# Class for querying a saved token index
+
+class TokenIndex:
+    """Read-only queries over a token index written by TokenStats.save"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path to the token index (.npz)
+        """
+        with np.load(path) as data:
+            word_blob = data["word_blob"].tobytes().decode("utf-8")
+            char_codes = data["char_codes"]
+            self.word_counts = data["word_counts"]
+            self.char_counts = data["char_counts"]
+            self.num_entries = int(data["num_entries"])
+        self.words = word_blob.split("\n") if word_blob else []
+        self.chars = [chr(c) for c in char_codes.tolist()]
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self.words)
+
+    @property
+    def num_tokens(self) -> int:
+        return int(self.word_counts.sum())
+
+    def count(self, word: str) -> int:
+        """Return the frequency of a word using binary search"""
+        i = bisect_left(self.words, word)
+        if i < len(self.words) and self.words[i] == word:
+            return int(self.word_counts[i])
+        return 0
+
+    def top_k(self, k: int = 20) -> list:
+        """Return the k most frequent words as (word, count) pairs"""
+        k = min(k, len(self.words))
+        if k == 0:
+            return []
+        top = np.argpartition(-self.word_counts, k - 1)[:k]
+        top = top[np.argsort(-self.word_counts[top], kind="stable")]
+        return [(self.words[i], int(self.word_counts[i])) for i in top]
+
+    def hapax(self) -> list:
+        """Return the words that occur exactly once"""
+        return [self.words[i] for i in np.flatnonzero(self.word_counts == 1)]
+
+    def oov(self, lexicon) -> list:
+        """Return the (word, count) pairs not found in a reference lexicon, most frequent first"""
+        lexicon = set(lexicon)
+        missing = [i for i, word in enumerate(self.words) if word not in lexicon]
+        missing.sort(key=lambda i: -self.word_counts[i])
+        return [(self.words[i], int(self.word_counts[i])) for i in missing]
+
+    def glued_words(self, max_count: int = 3, min_part_count: int = 10, min_part_length: int = 2,
+                    lexicon=None) -> list:
+        """
+        Find words that look like two words glued together by the PDF extraction.
+
+        A word is reported when it is rare (at most `max_count` occurrences), not
+        in `lexicon`, and can be split into two words of at least `min_part_length`
+        characters that each occur at least `min_part_count` times, e.g. "andnow"
+        into "and" + "now".
+
+        Returns:
+            List of (word, count, first part, second part), most frequent first
+        """
+        lexicon = set(lexicon) if lexicon is not None else set()
+        candidates = []
+        for i in np.flatnonzero(self.word_counts <= max_count):
+            word = self.words[i]
+            if word in lexicon:
+                continue
+            best = None
+            for split in range(min_part_length, len(word) - min_part_length + 1):
+                first_count = self.count(word[:split])
+                second_count = self.count(word[split:])
+                if min(first_count, second_count) < min_part_count:
+                    continue
+                if best is None or min(first_count, second_count) > best[0]:
+                    best = (min(first_count, second_count), word[:split], word[split:])
+            if best is not None:
+                candidates.append((word, int(self.word_counts[i]), best[1], best[2], best[0]))
+
+        # Most frequent first, then the ones whose parts are the most common words
+        candidates.sort(key=lambda c: (-c[1], -c[4]))
+        return [c[:4] for c in candidates]
+
+
+# Function for building a token index from the texts of a manifest
+
+def build_from_manifest(json_path, output_path):
+    stats = TokenStats()
+    with Manifest(json_path) as manifest:
+        for entry in manifest.iter_entries(text="lazy"):
+            stats.update(entry.get("text", ""))
+    stats.save(output_path)
+    return stats
+
+
+# Function for reading a reference lexicon with one word per line
+
+def read_lexicon(lexicon_path):
+    with open(lexicon_path, "r", encoding="utf-8") as f:
+        return [line.split()[0] for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Build, merge and query token frequency indexes.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Count the tokens in the text of a manifest.")
+    build_parser.add_argument("json_path", help="Manifest file (.jsonl).")
+    build_parser.add_argument("output_path", help="Path to save the token index (.npz).")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge token indexes built by separate workers.")
+    merge_parser.add_argument("output_path", help="Path to save the merged token index (.npz).")
+    merge_parser.add_argument("index_paths", nargs="+", help="Token indexes to merge.")
+
+    query_parser = subparsers.add_parser("query", help="Query a token index.")
+    query_parser.add_argument("index_path", help="Token index (.npz).")
+    query_parser.add_argument("--top", type=int, default=20, help="Number of most frequent words to show (default 20).")
+    query_parser.add_argument("--hapax", action="store_true", help="Show the words that occur only once.")
+    query_parser.add_argument("--lexicon", help="Reference lexicon with one word per line, to show out-of-vocabulary words.")
+    query_parser.add_argument("--glued", action="store_true", help="Show words that look like two words glued together.")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = build_from_manifest(args.json_path, args.output_path)
+        print(f"Counted {sum(stats.words.values())} words ({len(stats.words)} distinct) in {stats.num_entries} entries")
+
+    elif args.command == "merge":
+        stats = TokenStats()
+        for path in args.index_paths:
+            stats.merge(TokenStats.load(path))
+        stats.save(args.output_path)
+        print(f"Merged {len(args.index_paths)} indexes into {args.output_path} ({len(stats.words)} distinct words)")
+
+    else:
+        index = TokenIndex(args.index_path)
+        lexicon = read_lexicon(args.lexicon) if args.lexicon else None
+        print(f"Entries: {index.num_entries}, words: {index.num_tokens}, vocabulary size: {index.vocabulary_size}, alphabet size: {len(index.chars)}")
+        print(f"\nTop {args.top} words:")
+        for word, count in index.top_k(args.top):
+            print(f"  {word}\t{count}")
+        if args.hapax:
+            hapax = index.hapax()
+            print(f"\nWords occurring once ({len(hapax)}):")
+            print("  " + " ".join(hapax))
+        if lexicon is not None:
+            oov = index.oov(lexicon)
+            print(f"\nOut-of-vocabulary words ({len(oov)}):")
+            for word, count in oov:
+                print(f"  {word}\t{count}")
+        if args.glued:
+            glued = index.glued_words(lexicon=lexicon)
+            print(f"\nPossibly glued words ({len(glued)}):")
+            for word, count, first, second in glued:
+                print(f"  {word}\t{count}\t{first} + {second}")
@@ -0,0 +1,173 @@
+import struct
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+# Function for reading the format and the location of the samples from a RIFF/WAVE header
+
+def parse_header(file_path):
+    """
+    Walk the RIFF chunks of a .wav file.
+
+    Returns:
+    - Dict with format_tag, channels, samplerate, bits, data_offset and data_size,
+      or None if the file is not a RIFF/WAVE file with fmt and data chunks.
+    """
+    header = {}
+    with open(file_path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            return None
+
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                format_tag, channels, samplerate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+                # WAVE_FORMAT_EXTENSIBLE keeps the actual format in the first two bytes of the sub-format GUID
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                    format_tag = struct.unpack("<H", fmt[24:26])[0]
+                header.update(format_tag=format_tag, channels=channels, samplerate=samplerate, bits=bits)
+                f.seek(chunk_size % 2, 1)
+            elif chunk_id == b"data":
+                header.update(data_offset=f.tell(), data_size=chunk_size)
+                break
+            else:
+                # Chunks are padded to an even size
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+    if "format_tag" not in header:
+        return None
+    return header
+
+
+# Class for zero-copy access to 16-bit PCM .wav files
+
+class WavFile:
+    """Memory-mapped view of the samples of a 16-bit PCM .wav file"""
+
+    def __init__(self, file_path: str, header: dict):
+        """
+        Args:
+            file_path: Path to the .wav file
+            header: Result of parse_header for the file
+        """
+        self.file_path = file_path
+        self.samplerate = header["samplerate"]
+        self.channels = header["channels"]
+        # The data size in the header can be larger than the file for truncated or streamed files
+        frame_size = 2 * self.channels
+        with open(file_path, 'rb') as f:
+            f.seek(0, 2)
+            available = f.tell() - header["data_offset"]
+        self.frames = min(header["data_size"], available) // frame_size
+        self.samples = np.memmap(file_path, dtype="<i2", mode="r", offset=header["data_offset"],
+                                 shape=(self.frames, self.channels)) if self.frames > 0 else np.zeros((0, self.channels), dtype="<i2")
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+    def int16(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Return the samples of [start, stop) as int16 (a view into the file for mono audio)"""
+        window = self.samples[start:stop]
+        if self.channels == 1:
+            return window[:, 0]
+        return window.mean(axis=1).astype(np.int16)
+
+    def read(self, start: int = 0, stop: int = None, dtype: str = "float32") -> np.ndarray:
+        """Return the mono samples of [start, stop), scaled to [-1, 1) for float types"""
+        if np.dtype(dtype) == np.int16:
+            return np.array(self.int16(start, stop))
+        window = self.samples[start:stop].astype(dtype)
+        window = window[:, 0] if self.channels == 1 else window.mean(axis=1)
+        return window / 32768
+
+    def blocks(self, blocksize: int, start: int = 0, stop: int = None, dtype: str = "float32"):
+        """Yield consecutive windows of `blocksize` mono samples, converting one window at a time"""
+        stop = self.frames if stop is None else min(stop, self.frames)
+        for block_start in range(start, stop, blocksize):
+            yield self.read(block_start, min(block_start + blocksize, stop), dtype)
+
+
+# Class with the same interface as WavFile for formats that have to be decoded
+
+class DecodedAudio:
+    """Audio file read through soundfile, used for anything that is not 16-bit PCM .wav"""
+
+    def __init__(self, file_path: str):
+        # soundfile is only imported when a file actually has to be decoded
+        import soundfile as sf
+
+        self.file_path = file_path
+        info = sf.info(file_path)
+        self.samplerate = info.samplerate
+        self.channels = info.channels
+        self.frames = info.frames
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+    def read(self, start: int = 0, stop: int = None, dtype: str = "float32") -> np.ndarray:
+        # soundfile does not rescale floating point files to integer types, so int16 is converted from float
+        if np.dtype(dtype) == np.int16:
+            return self.int16(start, stop)
+        import soundfile as sf
+
+        y, _ = sf.read(self.file_path, start=start, stop=stop, dtype=dtype, always_2d=True)
+        return y[:, 0] if self.channels == 1 else y.mean(axis=1).astype(dtype)
+
+    def int16(self, start: int = 0, stop: int = None) -> np.ndarray:
+        return to_int16(self.read(start, stop, "float32"))
+
+    def blocks(self, blocksize: int, start: int = 0, stop: int = None, dtype: str = "float32"):
+        import soundfile as sf
+
+        read_dtype = "float32" if np.dtype(dtype) == np.int16 else dtype
+        for y in sf.blocks(self.file_path, blocksize=blocksize, start=start, stop=stop,
+                           dtype=read_dtype, always_2d=True):
+            y = y[:, 0] if self.channels == 1 else y.mean(axis=1).astype(read_dtype)
+            yield to_int16(y) if read_dtype != dtype else y
+
+
+# Function for converting samples in [-1, 1) to 16-bit integers
+
+def to_int16(y):
+    return np.clip(np.round(y * 32768), -32768, 32767).astype(np.int16)
+
+
+# Function for opening an audio file with the fastest available reader
+
+def open_audio(file_path):
+    """
+    Return a WavFile for 16-bit PCM .wav files and a DecodedAudio otherwise.
+    """
+    header = parse_header(file_path)
+    if header is not None and header["format_tag"] == WAVE_FORMAT_PCM and header["bits"] == 16:
+        return WavFile(file_path, header)
+    return DecodedAudio(file_path)
+
+
+# Function for the sampling rate and length of an audio file without reading the samples
+
+def info(file_path):
+    """
+    Returns:
+    - Tuple of (sampling rate, number of frames).
+    """
+    header = parse_header(file_path)
+    if header is not None and header["format_tag"] == WAVE_FORMAT_PCM and header["bits"] > 0:
+        with open(file_path, 'rb') as f:
+            f.seek(0, 2)
+            available = f.tell() - header["data_offset"]
+        frame_size = header["channels"] * header["bits"] // 8
+        return header["samplerate"], min(header["data_size"], available) // frame_size
+    audio = DecodedAudio(file_path)
+    return audio.samplerate, audio.frames